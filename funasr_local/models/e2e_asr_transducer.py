@@ -1,11 +1,12 @@
 """ESPnet2 ASR Transducer model."""
 
 import logging
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
 from typing import Dict, List, Optional, Tuple, Union
 
 import torch
 from packaging.version import parse as V
+from torch.utils.checkpoint import checkpoint
 from typeguard import check_argument_types
 
 from funasr_local.models.frontend.abs_frontend import AbsFrontend
@@ -14,11 +15,35 @@ from funasr_local.models.decoder.rnnt_decoder import RNNTDecoder
 from funasr_local.models.decoder.abs_decoder import AbsDecoder as AbsAttDecoder
 from funasr_local.models.encoder.conformer_encoder import ConformerChunkEncoder as Encoder
 from funasr_local.models.joint_net.joint_network import JointNetwork
+from funasr_local.losses.label_smoothing_loss import LabelSmoothingLoss
+from funasr_local.modules.e2e_asr_common import ErrorCalculatorTransducer
+from funasr_local.modules.inplace_log_softmax import InplaceLogSoftmax
 from funasr_local.modules.nets_utils import get_transducer_task_io
 from funasr_local.layers.abs_normalize import AbsNormalize
 from funasr_local.torch_utils.device_funcs import force_gatherable
 from funasr_local.train.abs_espnet_model import AbsESPnetModel
 
+try:
+    from warp_rnnt import rnnt_loss
+
+    is_warp_rnnt_available = True
+except ImportError:
+    is_warp_rnnt_available = False
+
+try:
+    import optimized_transducer
+
+    is_optimized_transducer_available = True
+except ImportError:
+    is_optimized_transducer_available = False
+
+try:
+    import fast_rnnt
+
+    is_fast_rnnt_available = True
+except ImportError:
+    is_fast_rnnt_available = False
+
 if V(torch.__version__) >= V("1.6.0"):
     from torch.cuda.amp import autocast
 else:
@@ -41,17 +66,28 @@ class TransducerModel(AbsESPnetModel):
         decoder: Decoder module.
         joint_network: Joint Network module.
         transducer_weight: Weight of the Transducer loss.
-        fastemit_lambda: FastEmit lambda value.
+        fastemit_lambda: FastEmit lambda value (0 disables FastEmit).
+        transducer_loss_backend: Transducer loss backend.
+                                 ("warp_rnnt" or "optimized_transducer")
+        use_pruned_transducer_loss: Whether to use fast_rnnt pruned Transducer loss.
+        prune_range: Number of label positions kept per frame for pruned loss.
+        simple_loss_scale: Weight of the simple loss used to get pruning ranges.
         auxiliary_ctc_weight: Weight of auxiliary CTC loss.
         auxiliary_ctc_dropout_rate: Dropout rate for auxiliary CTC loss inputs.
+        auxiliary_ctc_deterministic: Whether to request the deterministic cuDNN CTC kernel.
         auxiliary_lm_loss_weight: Weight of auxiliary LM loss.
         auxiliary_lm_loss_smoothing: Smoothing rate for LM loss' label smoothing.
+        auxiliary_amp_dtype: Autocast dtype for auxiliary CTC/LM projections.
         ignore_id: Initial padding ID.
         sym_space: Space symbol.
         sym_blank: Blank Symbol
         report_cer: Whether to report Character Error Rate during validation.
         report_wer: Whether to report Word Error Rate during validation.
+        report_interval: Compute CER/WER on every N-th validation batch only.
         extract_feats_in_collect_stats: Whether to use extract_feats stats collection.
+        compile_joint_network: Whether to compile the compact joint computation.
+        checkpoint_joint_network: Whether to recompute joint activations in backward.
+        compile_auxiliary_heads: Whether to compile the auxiliary CTC and LM heads.
 
     """
 
@@ -68,16 +104,26 @@ class TransducerModel(AbsESPnetModel):
         att_decoder: Optional[AbsAttDecoder] = None,
         transducer_weight: float = 1.0,
         fastemit_lambda: float = 0.0,
+        transducer_loss_backend: str = "warp_rnnt",
+        use_pruned_transducer_loss: bool = False,
+        prune_range: int = 5,
+        simple_loss_scale: float = 0.5,
         auxiliary_ctc_weight: float = 0.0,
         auxiliary_ctc_dropout_rate: float = 0.0,
+        auxiliary_ctc_deterministic: bool = False,
         auxiliary_lm_loss_weight: float = 0.0,
         auxiliary_lm_loss_smoothing: float = 0.0,
+        auxiliary_amp_dtype: Optional[str] = None,
         ignore_id: int = -1,
         sym_space: str = "<space>",
         sym_blank: str = "<blank>",
         report_cer: bool = True,
         report_wer: bool = True,
+        report_interval: int = 1,
         extract_feats_in_collect_stats: bool = True,
+        compile_joint_network: bool = False,
+        checkpoint_joint_network: bool = False,
+        compile_auxiliary_heads: bool = False,
     ) -> None:
         """Construct an ESPnetASRTransducerModel object."""
         super().__init__()
@@ -101,8 +147,37 @@ class TransducerModel(AbsESPnetModel):
         self.decoder = decoder
         self.joint_network = joint_network
 
-        self.criterion_transducer = None
-        self.error_calculator = None
+        # The unbound method is compiled and the joint network passed at call
+        # time, so the wrapper keeps no reference to the module.
+        self.compiled_joint = None
+        if compile_joint_network:
+            if V(torch.__version__) >= V("2.0.0"):
+                self.compiled_joint = torch.compile(
+                    type(joint_network).forward_compact, dynamic=True
+                )
+            else:
+                logging.warning(
+                    "torch.compile requires torch>=2.0.0, "
+                    "the joint network will not be compiled."
+                )
+        self.checkpoint_joint_network = checkpoint_joint_network
+
+        if transducer_loss_backend == "warp_rnnt":
+            self.criterion_transducer = rnnt_loss if is_warp_rnnt_available else None
+        elif transducer_loss_backend == "optimized_transducer":
+            self.criterion_transducer = (
+                optimized_transducer.transducer_loss
+                if is_optimized_transducer_available
+                else None
+            )
+        else:
+            raise ValueError(
+                f"Unknown transducer_loss_backend: {transducer_loss_backend}"
+            )
+        self.transducer_loss_backend = transducer_loss_backend
+
+        if transducer_loss_backend == "optimized_transducer" and fastemit_lambda > 0.0:
+            logging.warning("FastEmit is not applied with optimized_transducer loss.")
 
         self.use_auxiliary_ctc = auxiliary_ctc_weight > 0
         self.use_auxiliary_lm_loss = auxiliary_lm_loss_weight > 0
@@ -110,20 +185,66 @@ class TransducerModel(AbsESPnetModel):
         if self.use_auxiliary_ctc:
             self.ctc_lin = torch.nn.Linear(encoder.output_size, vocab_size)
             self.ctc_dropout_rate = auxiliary_ctc_dropout_rate
+            self.ctc_deterministic = auxiliary_ctc_deterministic
 
         if self.use_auxiliary_lm_loss:
             self.lm_lin = torch.nn.Linear(decoder.output_size, vocab_size)
-            self.lm_loss_smoothing = auxiliary_lm_loss_smoothing
+            # Rescaled so the smoothed target distribution is (1 - eps) on the
+            # label and eps / (V - 1) elsewhere, as cross_entropy spreads eps / V.
+            self.lm_loss_smoothing = (
+                auxiliary_lm_loss_smoothing * vocab_size / (vocab_size - 1)
+            )
+
+        # Compiled unbound and called with the model, see compiled_joint.
+        self.compiled_ctc_head = None
+        self.compiled_lm_head = None
+        if compile_auxiliary_heads:
+            if V(torch.__version__) >= V("2.0.0"):
+                self.compiled_ctc_head = torch.compile(
+                    type(self)._ctc_head, dynamic=True
+                )
+                self.compiled_lm_head = torch.compile(type(self)._lm_head, dynamic=True)
+            else:
+                logging.warning(
+                    "torch.compile requires torch>=2.0.0, "
+                    "the auxiliary heads will not be compiled."
+                )
 
         self.transducer_weight = transducer_weight
         self.fastemit_lambda = fastemit_lambda
 
+        self.use_pruned_transducer_loss = use_pruned_transducer_loss
+
+        if self.use_pruned_transducer_loss:
+            self.simple_am_proj = torch.nn.Linear(encoder.output_size, vocab_size)
+            self.simple_lm_proj = torch.nn.Linear(decoder.output_size, vocab_size)
+
+            self.prune_range = prune_range
+            self.simple_loss_scale = simple_loss_scale
+
+            if fastemit_lambda > 0.0:
+                logging.warning("FastEmit is not applied with pruned Transducer loss.")
+
         self.auxiliary_ctc_weight = auxiliary_ctc_weight
         self.auxiliary_lm_loss_weight = auxiliary_lm_loss_weight
 
+        self.auxiliary_amp_dtype = (
+            getattr(torch, auxiliary_amp_dtype) if auxiliary_amp_dtype else None
+        )
+
         self.report_cer = report_cer
         self.report_wer = report_wer
 
+        if report_cer or report_wer:
+            self.error_calculator = self._build_error_calculator()
+        else:
+            self.error_calculator = None
+
+        # Beam search decoding can cost as much as the forward itself.
+        assert report_interval >= 1, report_interval
+        self.report_interval = report_interval
+        self.num_validation_batches = 0
+
         self.extract_feats_in_collect_stats = extract_feats_in_collect_stats
 
     def forward(
@@ -157,8 +278,18 @@ class TransducerModel(AbsESPnetModel):
             == text_lengths.shape[0]
         ), (speech.shape, speech_lengths.shape, text.shape, text_lengths.shape)
 
+        # Replicas are re-created on every step, counter updates would be lost.
+        if (
+            self.report_interval > 1
+            and (self.report_cer or self.report_wer)
+            and getattr(self, "_is_replica", False)
+        ):
+            raise RuntimeError(
+                "report_interval > 1 is not supported with DataParallel (ngpu > 1), "
+                "use distributed training or set report_interval to 1."
+            )
+
         batch_size = speech.shape[0]
-        text = text[:, : text_lengths.max()]
 
         # 1. Encoder
         encoder_out, encoder_out_lens = self.encode(speech, speech_lengths)
@@ -169,26 +300,16 @@ class TransducerModel(AbsESPnetModel):
             encoder_out_lens,
             ignore_id=self.ignore_id,
         )
+        target_mask = target != self.blank_id
 
         # 3. Decoder
         self.decoder.set_device(encoder_out.device)
         decoder_out = self.decoder(decoder_in, u_len)
 
-        # 4. Joint Network
-        joint_out = self.joint_network(
-            encoder_out.unsqueeze(2), decoder_out.unsqueeze(1)
-        )
-
-        # 5. Losses
-        loss_trans, cer_trans, wer_trans = self._calc_transducer_loss(
-            encoder_out,
-            joint_out,
-            target,
-            t_len,
-            u_len,
-        )
-
-        loss_ctc, loss_lm = 0.0, 0.0
+        # 4. Auxiliary losses, computed first so their transient logits are
+        # released before the joint network output is allocated.
+        loss_zero = torch.zeros((), device=encoder_out.device)
+        loss_ctc, loss_lm = loss_zero, loss_zero
 
         if self.use_auxiliary_ctc:
             loss_ctc = self._calc_ctc_loss(
@@ -196,25 +317,45 @@ class TransducerModel(AbsESPnetModel):
                 target,
                 t_len,
                 u_len,
+                target_mask,
             )
 
         if self.use_auxiliary_lm_loss:
             loss_lm = self._calc_lm_loss(decoder_out, target)
 
+        # 5. Joint Network and Transducer loss
+        loss_trans, cer_trans, wer_trans = self._calc_transducer_loss(
+            encoder_out,
+            decoder_out,
+            target,
+            t_len,
+            u_len,
+            target_mask,
+        )
+
         loss = (
             self.transducer_weight * loss_trans
             + self.auxiliary_ctc_weight * loss_ctc
             + self.auxiliary_lm_loss_weight * loss_lm
         )
 
+        stats_losses = dict(loss=loss, loss_transducer=loss_trans)
+
+        if self.use_auxiliary_ctc:
+            stats_losses["aux_ctc_loss"] = loss_ctc
+
+        if self.use_auxiliary_lm_loss:
+            stats_losses["aux_lm_loss"] = loss_lm
+
         stats = dict(
-            loss=loss.detach(),
-            loss_transducer=loss_trans.detach(),
-            aux_ctc_loss=loss_ctc.detach() if loss_ctc > 0.0 else None,
-            aux_lm_loss=loss_lm.detach() if loss_lm > 0.0 else None,
+            aux_ctc_loss=None,
+            aux_lm_loss=None,
             cer_transducer=cer_trans,
             wer_transducer=wer_trans,
         )
+        stats.update(
+            zip(stats_losses, torch.stack(list(stats_losses.values())).detach())
+        )
 
         # force_gatherable: to-device and to-tensor if scalar for DataParallel
         loss, stats, weight = force_gatherable((loss, stats, batch_size), loss.device)
@@ -315,8 +456,11 @@ class TransducerModel(AbsESPnetModel):
         """
         assert speech_lengths.dim() == 1, speech_lengths.shape
 
-        # for data-parallel
-        speech = speech[:, : speech_lengths.max()]
+        # for data-parallel: only DataParallel replicas may receive a slice of the
+        # batch padded beyond its own max length, the collate_fn already trims
+        # the batch otherwise and slicing would force a host sync.
+        if getattr(self, "_is_replica", False):
+            speech = speech[:, : speech_lengths.max()]
 
         if self.frontend is not None:
             feats, feats_lengths = self.frontend(speech, speech_lengths)
@@ -328,19 +472,21 @@ class TransducerModel(AbsESPnetModel):
     def _calc_transducer_loss(
         self,
         encoder_out: torch.Tensor,
-        joint_out: torch.Tensor,
+        decoder_out: torch.Tensor,
         target: torch.Tensor,
         t_len: torch.Tensor,
         u_len: torch.Tensor,
+        target_mask: torch.Tensor,
     ) -> Tuple[torch.Tensor, Optional[float], Optional[float]]:
         """Compute Transducer loss.
 
         Args:
             encoder_out: Encoder output sequences. (B, T, D_enc)
-            joint_out: Joint Network output sequences (B, T, U, D_joint)
+            decoder_out: Decoder output sequences. (B, U + 1, D_dec)
             target: Target label ID sequences. (B, L)
             t_len: Encoder output sequences lengths. (B,)
             u_len: Target label ID sequences lengths. (B,)
+            target_mask: Non-padding mask of target label ID sequences. (B, L)
 
         Return:
             loss_transducer: Transducer loss value.
@@ -348,61 +494,300 @@ class TransducerModel(AbsESPnetModel):
             wer_transducer: Word Error Rate for Transducer.
 
         """
-        if self.criterion_transducer is None:
-            try:
-                # from warprnnt_pytorch import RNNTLoss
-	        # self.criterion_transducer = RNNTLoss(
-                    # reduction="mean",
-                    # fastemit_lambda=self.fastemit_lambda,
-                # )
-                from warp_rnnt import rnnt_loss as RNNTLoss
-                self.criterion_transducer = RNNTLoss
-
-            except ImportError:
-                logging.error(
-                    "warp-rnnt was not installed."
-                    "Please consult the installation documentation."
+        if self.use_pruned_transducer_loss:
+            loss_transducer = self._calc_pruned_transducer_loss(
+                encoder_out, decoder_out, target, t_len, u_len
+            ).mean()
+        else:
+            if self.checkpoint_joint_network and self.training:
+                joint_out = checkpoint(
+                    self._compact_joint,
+                    encoder_out,
+                    decoder_out,
+                    t_len,
+                    u_len,
+                    use_reentrant=False,
                 )
-                exit(1)
-
-        # loss_transducer = self.criterion_transducer(
-        #     joint_out,
-        #     target,
-        #     t_len,
-        #     u_len,
-        # )
-        log_probs = torch.log_softmax(joint_out, dim=-1)
-
-        loss_transducer = self.criterion_transducer(
-                log_probs,
+            else:
+                joint_out = self._compact_joint(encoder_out, decoder_out, t_len, u_len)
+
+            loss_transducer = self._calc_compact_transducer_loss(
+                joint_out, target, t_len, u_len, target_mask, reduction="mean"
+            )
+
+        if not self.training and (self.report_cer or self.report_wer):
+            self.num_validation_batches += 1
+
+            if (self.num_validation_batches - 1) % self.report_interval == 0:
+                cer_transducer, wer_transducer = self._get_error_calculator()(
+                    encoder_out, target, t_len
+                )
+
+                return loss_transducer, cer_transducer, wer_transducer
+
+        return loss_transducer, None, None
+
+    def _build_error_calculator(self) -> ErrorCalculatorTransducer:
+        """Build the Transducer error calculator on this module's decoder and joint.
+
+        Return:
+            : Transducer CER/WER calculator.
+
+        """
+        return ErrorCalculatorTransducer(
+            self.decoder,
+            self.joint_network,
+            self.token_list,
+            self.sym_space,
+            self.sym_blank,
+            report_cer=self.report_cer,
+            report_wer=self.report_wer,
+        )
+
+    def _get_error_calculator(self) -> ErrorCalculatorTransducer:
+        """Get the Transducer error calculator.
+
+        DataParallel replicas share the original model's attributes, the
+        calculator built in __init__ would decode with the modules on the
+        first device. Replicas build their own on their decoder and joint.
+
+        Return:
+            : Transducer CER/WER calculator.
+
+        """
+        if getattr(self, "_is_replica", False):
+            return self._build_error_calculator()
+
+        return self.error_calculator
+
+    def _check_compiled_replica(self, option: str) -> None:
+        """Reject compiled computations in DataParallel replicas.
+
+        DataParallel re-creates the replicas on every step, each one would
+        trigger a recompilation.
+
+        Args:
+            option: Name of the compile option in use.
+
+        """
+        if getattr(self, "_is_replica", False):
+            raise RuntimeError(
+                f"{option} is not supported with DataParallel (ngpu > 1), "
+                "use distributed training or disable the option."
+            )
+
+    def _compact_joint(
+        self,
+        enc_out: torch.Tensor,
+        dec_out: torch.Tensor,
+        t_len: torch.Tensor,
+        u_len: torch.Tensor,
+        project_input: bool = True,
+    ) -> torch.Tensor:
+        """Compute joint network outputs on the valid (t, u) pairs.
+
+        Args:
+            enc_out: Encoder output sequences. (B, T, D_enc)
+            dec_out: Decoder output sequences. (B, U + 1, D_dec)
+            t_len: Encoder output sequences lengths. (B,)
+            u_len: Target label ID sequences lengths. (B,)
+            project_input: Whether enc_out and dec_out still need projection.
+
+        Return:
+            joint_out: Joint output sequences, compact layout. (N, D_out)
+
+        """
+        if self.compiled_joint is None:
+            return self.joint_network.forward_compact(
+                enc_out, dec_out, t_len, u_len, project_input=project_input
+            )
+
+        self._check_compiled_replica("compile_joint_network")
+
+        return self.compiled_joint(
+            self.joint_network, enc_out, dec_out, t_len, u_len, project_input
+        )
+
+    def _calc_compact_transducer_loss(
+        self,
+        joint_out: torch.Tensor,
+        target: torch.Tensor,
+        t_len: torch.Tensor,
+        u_len: torch.Tensor,
+        target_mask: torch.Tensor,
+        reduction: str = "mean",
+    ) -> torch.Tensor:
+        """Compute Transducer loss from compact joint network outputs.
+
+        Args:
+            joint_out: Joint network outputs, compact layout. (N, D_out)
+            target: Target label ID sequences. (B, L)
+            t_len: Encoder output sequences lengths. (B,)
+            u_len: Target label ID sequences lengths. (B,)
+            target_mask: Non-padding mask of target label ID sequences. (B, L)
+            reduction: Reduction applied to per-sequence losses.
+
+        Return:
+            loss_transducer: Transducer loss value.
+
+        """
+        if self.criterion_transducer is None:
+            raise ImportError(
+                f"{self.transducer_loss_backend} was not installed. "
+                "Please consult the installation documentation."
+            )
+
+        if self.transducer_loss_backend == "optimized_transducer":
+            # Log-softmax is fused in the loss, gradients reuse the logits buffer.
+            return self.criterion_transducer(
+                joint_out.float(),
                 target,
                 t_len,
                 u_len,
-                reduction="mean",
                 blank=self.blank_id,
-                fastemit_lambda=self.fastemit_lambda,
-                gather=True,
+                reduction=reduction,
+            )
+
+        # FastEmit adds gradient terms on every (t, u) node, only request it if set.
+        fastemit_kwargs = (
+            {"fastemit_lambda": self.fastemit_lambda} if self.fastemit_lambda > 0 else {}
         )
 
-        if not self.training and (self.report_cer or self.report_wer):
-            if self.error_calculator is None:
-                from funasr_local.modules.e2e_asr_common import ErrorCalculatorTransducer as ErrorCalculator
-
-                self.error_calculator = ErrorCalculator(
-                    self.decoder,
-                    self.joint_network,
-                    self.token_list,
-                    self.sym_space,
-                    self.sym_blank,
-                    report_cer=self.report_cer,
-                    report_wer=self.report_wer,
-                )
+        return self.criterion_transducer(
+            InplaceLogSoftmax.apply(joint_out.float()),
+            target[target_mask],
+            t_len,
+            u_len,
+            reduction=reduction,
+            blank=self.blank_id,
+            gather=True,
+            compact=True,
+            **fastemit_kwargs,
+        )
 
-            cer_transducer, wer_transducer = self.error_calculator(encoder_out, target, t_len)
+    def _calc_pruned_transducer_loss(
+        self,
+        encoder_out: torch.Tensor,
+        decoder_out: torch.Tensor,
+        target: torch.Tensor,
+        t_len: torch.Tensor,
+        u_len: torch.Tensor,
+    ) -> torch.Tensor:
+        """Compute pruned Transducer loss with fast_rnnt.
 
-            return loss_transducer, cer_transducer, wer_transducer
+        A simple (trivial joiner) loss gives the pruning ranges, the joint network
+        is then only evaluated on prune_range label positions per frame.
 
-        return loss_transducer, None, None
+        Args:
+            encoder_out: Encoder output sequences. (B, T, D_enc)
+            decoder_out: Decoder output sequences. (B, U + 1, D_dec)
+            target: Target label ID sequences. (B, L)
+            t_len: Encoder output sequences lengths. (B,)
+            u_len: Target label ID sequences lengths. (B,)
+
+        Return:
+            loss_transducer: Transducer loss value per sequence. (B,)
+
+        """
+        if not is_fast_rnnt_available:
+            raise ImportError(
+                "fast_rnnt was not installed. "
+                "Please consult the installation documentation."
+            )
+
+        symbols = target.long()
+        boundary = torch.stack(
+            [torch.zeros_like(t_len), torch.zeros_like(t_len), u_len, t_len], dim=1
+        ).long()
+
+        simple_loss, (px_grad, py_grad) = fast_rnnt.rnnt_loss_simple(
+            lm=self.simple_lm_proj(decoder_out).float(),
+            am=self.simple_am_proj(encoder_out).float(),
+            symbols=symbols,
+            termination_symbol=self.blank_id,
+            boundary=boundary,
+            reduction="none",
+            return_grad=True,
+        )
+
+        ranges = fast_rnnt.get_rnnt_prune_ranges(
+            px_grad=px_grad,
+            py_grad=py_grad,
+            boundary=boundary,
+            s_range=self.prune_range,
+        )
+
+        am_pruned, lm_pruned = fast_rnnt.do_rnnt_pruning(
+            am=self.joint_network.lin_enc(encoder_out),
+            lm=self.joint_network.lin_dec(decoder_out),
+            ranges=ranges,
+        )
+        joint_out = self.joint_network(am_pruned, lm_pruned, project_input=False)
+
+        pruned_loss = fast_rnnt.rnnt_loss_pruned(
+            logits=joint_out.float(),
+            symbols=symbols,
+            ranges=ranges,
+            termination_symbol=self.blank_id,
+            boundary=boundary,
+            reduction="none",
+        )
+
+        return self.simple_loss_scale * simple_loss + pruned_loss
+
+    def _auxiliary_autocast(self):
+        """Get autocast context for auxiliary CTC and LM projections.
+
+        Return:
+            : Autocast context if auxiliary_amp_dtype is set, no-op context otherwise.
+
+        """
+        if self.auxiliary_amp_dtype is None:
+            return nullcontext()
+
+        return autocast(dtype=self.auxiliary_amp_dtype)
+
+    def _ctc_head(self, encoder_out: torch.Tensor) -> torch.Tensor:
+        """Compute auxiliary CTC log-probabilities.
+
+        Args:
+            encoder_out: Encoder output sequences. (B, T, D_enc)
+
+        Return:
+            : CTC log-probabilities. (T, B, vocab_size)
+
+        """
+        with self._auxiliary_autocast():
+            ctc_in = self.ctc_lin(
+                torch.nn.functional.dropout(encoder_out, p=self.ctc_dropout_rate)
+            )
+
+        return torch.log_softmax(ctc_in.transpose(0, 1).float(), dim=-1)
+
+    def _lm_head(
+        self, decoder_out: torch.Tensor, lm_target: torch.Tensor
+    ) -> torch.Tensor:
+        """Compute summed auxiliary LM loss.
+
+        Args:
+            decoder_out: Decoder output sequences. (B, U, D_dec)
+            lm_target: Next label ID sequences, padded with blank ID. (B * U,)
+
+        Return:
+            : Summed LM loss value.
+
+        """
+        with self._auxiliary_autocast():
+            lm_loss_in = self.lm_lin(decoder_out).view(-1, self.vocab_size)
+
+        # Ignore blank ID (0).
+        return torch.nn.functional.cross_entropy(
+            lm_loss_in.float(),
+            lm_target,
+            ignore_index=0,
+            label_smoothing=self.lm_loss_smoothing,
+            reduction="sum",
+        )
 
     def _calc_ctc_loss(
         self,
@@ -410,6 +795,7 @@ class TransducerModel(AbsESPnetModel):
         target: torch.Tensor,
         t_len: torch.Tensor,
         u_len: torch.Tensor,
+        target_mask: torch.Tensor,
     ) -> torch.Tensor:
         """Compute CTC loss.
 
@@ -418,20 +804,33 @@ class TransducerModel(AbsESPnetModel):
             target: Target label ID sequences. (B, L)
             t_len: Encoder output sequences lengths. (B,)
             u_len: Target label ID sequences lengths. (B,)
+            target_mask: Non-padding mask of target label ID sequences. (B, L)
 
         Return:
             loss_ctc: CTC loss value.
 
         """
-        ctc_in = self.ctc_lin(
-            torch.nn.functional.dropout(encoder_out, p=self.ctc_dropout_rate)
-        )
-        ctc_in = torch.log_softmax(ctc_in.transpose(0, 1), dim=-1)
-
-        target_mask = target != 0
-        ctc_target = target[target_mask].cpu()
+        if self.compiled_ctc_head is None:
+            ctc_in = self._ctc_head(encoder_out)
+        else:
+            self._check_compiled_replica("compile_auxiliary_heads")
+            ctc_in = self.compiled_ctc_head(self, encoder_out)
+
+        if self.ctc_deterministic:
+            # cuDNN's deterministic CTC kernel is only selected for float32
+            # log-probs, blank ID 0, concatenated int32 host targets, labels
+            # sequences shorter than 256 and all input lengths equal to T.
+            # ctc_loss silently falls back to the native kernel otherwise.
+            ctc_context = torch.backends.cudnn.flags(enabled=True, deterministic=True)
+            ctc_target = target[target_mask].cpu()
+        else:
+            # The native kernel reads padded (B, L) targets up to u_len.
+            ctc_context = nullcontext()
+            ctc_target = target
 
-        with torch.backends.cudnn.flags(deterministic=True):
+        # ctc_loss copies t_len and u_len to the host internally, so each call
+        # still syncs once: encoder output lengths only exist on the device here.
+        with ctc_context:
             loss_ctc = torch.nn.functional.ctc_loss(
                 ctc_in,
                 ctc_target,
@@ -459,27 +858,16 @@ class TransducerModel(AbsESPnetModel):
             loss_lm: LM loss value.
 
         """
-        lm_loss_in = self.lm_lin(decoder_out[:, :-1, :]).view(-1, self.vocab_size)
-        lm_target = target.view(-1).type(torch.int64)
-
-        with torch.no_grad():
-            true_dist = lm_loss_in.clone()
-            true_dist.fill_(self.lm_loss_smoothing / (self.vocab_size - 1))
+        # The last decoder state has no next label: targets are padded with the
+        # ignored blank ID rather than slicing (and copying) decoder_out.
+        lm_target = torch.nn.functional.pad(target, (0, 1)).view(-1).to(torch.long)
 
-            # Ignore blank ID (0)
-            ignore = lm_target == 0
-            lm_target = lm_target.masked_fill(ignore, 0)
-
-            true_dist.scatter_(1, lm_target.unsqueeze(1), (1 - self.lm_loss_smoothing))
-
-        loss_lm = torch.nn.functional.kl_div(
-            torch.log_softmax(lm_loss_in, dim=1),
-            true_dist,
-            reduction="none",
-        )
-        loss_lm = loss_lm.masked_fill(ignore.unsqueeze(1), 0).sum() / decoder_out.size(
-            0
-        )
+        if self.compiled_lm_head is None:
+            loss_lm = self._lm_head(decoder_out, lm_target)
+        else:
+            self._check_compiled_replica("compile_auxiliary_heads")
+            loss_lm = self.compiled_lm_head(self, decoder_out, lm_target)
+        loss_lm = loss_lm / decoder_out.size(0)
 
         return loss_lm
 
@@ -495,17 +883,28 @@ class UnifiedTransducerModel(AbsESPnetModel):
         decoder: Decoder module.
         joint_network: Joint Network module.
         transducer_weight: Weight of the Transducer loss.
-        fastemit_lambda: FastEmit lambda value.
+        fastemit_lambda: FastEmit lambda value (0 disables FastEmit).
+        transducer_loss_backend: Transducer loss backend.
+                                 ("warp_rnnt" or "optimized_transducer")
+        use_pruned_transducer_loss: Whether to use fast_rnnt pruned Transducer loss.
+        prune_range: Number of label positions kept per frame for pruned loss.
+        simple_loss_scale: Weight of the simple loss used to get pruning ranges.
         auxiliary_ctc_weight: Weight of auxiliary CTC loss.
         auxiliary_ctc_dropout_rate: Dropout rate for auxiliary CTC loss inputs.
+        auxiliary_ctc_deterministic: Whether to request the deterministic cuDNN CTC kernel.
         auxiliary_lm_loss_weight: Weight of auxiliary LM loss.
         auxiliary_lm_loss_smoothing: Smoothing rate for LM loss' label smoothing.
+        auxiliary_amp_dtype: Autocast dtype for auxiliary CTC/LM/attention heads.
         ignore_id: Initial padding ID.
         sym_space: Space symbol.
         sym_blank: Blank Symbol
         report_cer: Whether to report Character Error Rate during validation.
         report_wer: Whether to report Word Error Rate during validation.
+        report_interval: Compute CER/WER on every N-th validation batch only.
         extract_feats_in_collect_stats: Whether to use extract_feats stats collection.
+        compile_joint_network: Whether to compile the compact joint computation.
+        checkpoint_joint_network: Whether to recompute joint activations in backward.
+        compile_auxiliary_heads: Whether to compile the auxiliary CTC and LM heads.
     """
 
     def __init__(
@@ -521,21 +920,31 @@ class UnifiedTransducerModel(AbsESPnetModel):
         att_decoder: Optional[AbsAttDecoder] = None,
         transducer_weight: float = 1.0,
         fastemit_lambda: float = 0.0,
+        transducer_loss_backend: str = "warp_rnnt",
+        use_pruned_transducer_loss: bool = False,
+        prune_range: int = 5,
+        simple_loss_scale: float = 0.5,
         auxiliary_ctc_weight: float = 0.0,
         auxiliary_att_weight: float = 0.0,
         auxiliary_ctc_dropout_rate: float = 0.0,
+        auxiliary_ctc_deterministic: bool = False,
         auxiliary_lm_loss_weight: float = 0.0,
         auxiliary_lm_loss_smoothing: float = 0.0,
+        auxiliary_amp_dtype: Optional[str] = None,
         ignore_id: int = -1,
         sym_space: str = "<space>",
         sym_blank: str = "<blank>",
         report_cer: bool = True,
         report_wer: bool = True,
+        report_interval: int = 1,
         sym_sos: str = "<s>",
         sym_eos: str = "</s>",
         extract_feats_in_collect_stats: bool = True,
         lsm_weight: float = 0.0,
         length_normalized_loss: bool = False,
+        compile_joint_network: bool = False,
+        checkpoint_joint_network: bool = False,
+        compile_auxiliary_heads: bool = False,
     ) -> None:
         """Construct an ESPnetASRTransducerModel object."""
         super().__init__()
@@ -569,8 +978,37 @@ class UnifiedTransducerModel(AbsESPnetModel):
         self.decoder = decoder
         self.joint_network = joint_network
 
-        self.criterion_transducer = None
-        self.error_calculator = None
+        # The unbound method is compiled and the joint network passed at call
+        # time, so the wrapper keeps no reference to the module.
+        self.compiled_joint = None
+        if compile_joint_network:
+            if V(torch.__version__) >= V("2.0.0"):
+                self.compiled_joint = torch.compile(
+                    type(joint_network).forward_compact, dynamic=True
+                )
+            else:
+                logging.warning(
+                    "torch.compile requires torch>=2.0.0, "
+                    "the joint network will not be compiled."
+                )
+        self.checkpoint_joint_network = checkpoint_joint_network
+
+        if transducer_loss_backend == "warp_rnnt":
+            self.criterion_transducer = rnnt_loss if is_warp_rnnt_available else None
+        elif transducer_loss_backend == "optimized_transducer":
+            self.criterion_transducer = (
+                optimized_transducer.transducer_loss
+                if is_optimized_transducer_available
+                else None
+            )
+        else:
+            raise ValueError(
+                f"Unknown transducer_loss_backend: {transducer_loss_backend}"
+            )
+        self.transducer_loss_backend = transducer_loss_backend
+
+        if transducer_loss_backend == "optimized_transducer" and fastemit_lambda > 0.0:
+            logging.warning("FastEmit is not applied with optimized_transducer loss.")
 
         self.use_auxiliary_ctc = auxiliary_ctc_weight > 0
         self.use_auxiliary_att = auxiliary_att_weight > 0
@@ -579,6 +1017,7 @@ class UnifiedTransducerModel(AbsESPnetModel):
         if self.use_auxiliary_ctc:
             self.ctc_lin = torch.nn.Linear(encoder.output_size, vocab_size)
             self.ctc_dropout_rate = auxiliary_ctc_dropout_rate
+            self.ctc_deterministic = auxiliary_ctc_deterministic
 
         if self.use_auxiliary_att:
             self.att_decoder = att_decoder
@@ -592,18 +1031,63 @@ class UnifiedTransducerModel(AbsESPnetModel):
 
         if self.use_auxiliary_lm_loss:
             self.lm_lin = torch.nn.Linear(decoder.output_size, vocab_size)
-            self.lm_loss_smoothing = auxiliary_lm_loss_smoothing
+            # Rescaled so the smoothed target distribution is (1 - eps) on the
+            # label and eps / (V - 1) elsewhere, as cross_entropy spreads eps / V.
+            self.lm_loss_smoothing = (
+                auxiliary_lm_loss_smoothing * vocab_size / (vocab_size - 1)
+            )
+
+        # Compiled unbound and called with the model, see compiled_joint.
+        self.compiled_ctc_head = None
+        self.compiled_lm_head = None
+        if compile_auxiliary_heads:
+            if V(torch.__version__) >= V("2.0.0"):
+                self.compiled_ctc_head = torch.compile(
+                    type(self)._ctc_head, dynamic=True
+                )
+                self.compiled_lm_head = torch.compile(type(self)._lm_head, dynamic=True)
+            else:
+                logging.warning(
+                    "torch.compile requires torch>=2.0.0, "
+                    "the auxiliary heads will not be compiled."
+                )
 
         self.transducer_weight = transducer_weight
         self.fastemit_lambda = fastemit_lambda
 
+        self.use_pruned_transducer_loss = use_pruned_transducer_loss
+
+        if self.use_pruned_transducer_loss:
+            self.simple_am_proj = torch.nn.Linear(encoder.output_size, vocab_size)
+            self.simple_lm_proj = torch.nn.Linear(decoder.output_size, vocab_size)
+
+            self.prune_range = prune_range
+            self.simple_loss_scale = simple_loss_scale
+
+            if fastemit_lambda > 0.0:
+                logging.warning("FastEmit is not applied with pruned Transducer loss.")
+
         self.auxiliary_ctc_weight = auxiliary_ctc_weight
         self.auxiliary_att_weight = auxiliary_att_weight
         self.auxiliary_lm_loss_weight = auxiliary_lm_loss_weight
 
+        self.auxiliary_amp_dtype = (
+            getattr(torch, auxiliary_amp_dtype) if auxiliary_amp_dtype else None
+        )
+
         self.report_cer = report_cer
         self.report_wer = report_wer
 
+        if report_cer or report_wer:
+            self.error_calculator = self._build_error_calculator()
+        else:
+            self.error_calculator = None
+
+        # Beam search decoding can cost as much as the forward itself.
+        assert report_interval >= 1, report_interval
+        self.report_interval = report_interval
+        self.num_validation_batches = 0
+
         self.extract_feats_in_collect_stats = extract_feats_in_collect_stats
 
     def forward(
@@ -634,13 +1118,24 @@ class UnifiedTransducerModel(AbsESPnetModel):
             == text_lengths.shape[0]
         ), (speech.shape, speech_lengths.shape, text.shape, text_lengths.shape)
 
+        # Replicas are re-created on every step, counter updates would be lost.
+        if (
+            self.report_interval > 1
+            and (self.report_cer or self.report_wer)
+            and getattr(self, "_is_replica", False)
+        ):
+            raise RuntimeError(
+                "report_interval > 1 is not supported with DataParallel (ngpu > 1), "
+                "use distributed training or set report_interval to 1."
+            )
+
         batch_size = speech.shape[0]
-        text = text[:, : text_lengths.max()]
         #print(speech.shape)
         # 1. Encoder
         encoder_out, encoder_out_chunk, encoder_out_lens = self.encode(speech, speech_lengths)
 
-        loss_att, loss_att_chunk = 0.0, 0.0
+        loss_zero = torch.zeros((), device=encoder_out.device)
+        loss_att, loss_att_chunk = loss_zero, loss_zero
 
         if self.use_auxiliary_att:
             loss_att, _ = self._calc_att_loss(
@@ -656,38 +1151,15 @@ class UnifiedTransducerModel(AbsESPnetModel):
             encoder_out_lens,
             ignore_id=self.ignore_id,
         )
+        target_mask = target != self.blank_id
 
         # 3. Decoder
         self.decoder.set_device(encoder_out.device)
         decoder_out = self.decoder(decoder_in, u_len)
 
-        # 4. Joint Network
-        joint_out = self.joint_network(
-            encoder_out.unsqueeze(2), decoder_out.unsqueeze(1)
-        )
-
-        joint_out_chunk = self.joint_network(
-            encoder_out_chunk.unsqueeze(2), decoder_out.unsqueeze(1)
-        )
-
-        # 5. Losses
-        loss_trans_utt, cer_trans, wer_trans = self._calc_transducer_loss(
-            encoder_out,
-            joint_out,
-            target,
-            t_len,
-            u_len,
-        )
-
-        loss_trans_chunk, cer_trans_chunk, wer_trans_chunk = self._calc_transducer_loss(
-            encoder_out_chunk,
-            joint_out_chunk,
-            target,
-            t_len,
-            u_len,
-        )
-
-        loss_ctc, loss_ctc_chunk, loss_lm = 0.0, 0.0, 0.0
+        # 4. Auxiliary losses, computed first so their transient logits are
+        # released before the joint network output is allocated.
+        loss_ctc, loss_ctc_chunk, loss_lm = loss_zero, loss_zero, loss_zero
 
         if self.use_auxiliary_ctc:
             loss_ctc = self._calc_ctc_loss(
@@ -695,19 +1167,40 @@ class UnifiedTransducerModel(AbsESPnetModel):
                 target,
                 t_len,
                 u_len,
+                target_mask,
             )
             loss_ctc_chunk = self._calc_ctc_loss(
                 encoder_out_chunk,
                 target,
                 t_len,
                 u_len,
+                target_mask,
             )
 
         if self.use_auxiliary_lm_loss:
             loss_lm = self._calc_lm_loss(decoder_out, target)
 
+        # 5. Joint Network and Transducer loss
+        loss_trans_utt, loss_trans_chunk = self._calc_transducer_loss(
+            encoder_out,
+            encoder_out_chunk,
+            decoder_out,
+            target,
+            t_len,
+            u_len,
+            target_mask,
+        )
+
+        if not self.training and (self.report_cer or self.report_wer):
+            self.num_validation_batches += 1
+
+        cer_trans, wer_trans = self._calc_transducer_error(encoder_out, target, t_len)
+        cer_trans_chunk, wer_trans_chunk = self._calc_transducer_error(
+            encoder_out_chunk, target, t_len
+        )
+
         loss_trans = loss_trans_utt + loss_trans_chunk
-        loss_ctc = loss_ctc + loss_ctc_chunk 
+        loss_ctc = loss_ctc + loss_ctc_chunk
         loss_ctc = loss_att + loss_att_chunk
 
         loss = (
@@ -717,20 +1210,37 @@ class UnifiedTransducerModel(AbsESPnetModel):
             + self.auxiliary_lm_loss_weight * loss_lm
         )
 
+        stats_losses = dict(
+            loss=loss,
+            loss_transducer=loss_trans_utt,
+            loss_transducer_chunk=loss_trans_chunk,
+        )
+
+        if self.use_auxiliary_ctc:
+            stats_losses["aux_ctc_loss"] = loss_ctc
+            stats_losses["aux_ctc_loss_chunk"] = loss_ctc_chunk
+
+        if self.use_auxiliary_att:
+            stats_losses["aux_att_loss"] = loss_att
+            stats_losses["aux_att_loss_chunk"] = loss_att_chunk
+
+        if self.use_auxiliary_lm_loss:
+            stats_losses["aux_lm_loss"] = loss_lm
+
         stats = dict(
-            loss=loss.detach(),
-            loss_transducer=loss_trans_utt.detach(),
-            loss_transducer_chunk=loss_trans_chunk.detach(),
-            aux_ctc_loss=loss_ctc.detach() if loss_ctc > 0.0 else None,
-            aux_ctc_loss_chunk=loss_ctc_chunk.detach() if loss_ctc_chunk > 0.0 else None,
-            aux_att_loss=loss_att.detach() if loss_att > 0.0 else None,
-            aux_att_loss_chunk=loss_att_chunk.detach() if loss_att_chunk > 0.0 else None,
-            aux_lm_loss=loss_lm.detach() if loss_lm > 0.0 else None,
+            aux_ctc_loss=None,
+            aux_ctc_loss_chunk=None,
+            aux_att_loss=None,
+            aux_att_loss_chunk=None,
+            aux_lm_loss=None,
             cer_transducer=cer_trans,
             wer_transducer=wer_trans,
             cer_transducer_chunk=cer_trans_chunk,
             wer_transducer_chunk=wer_trans_chunk,
         )
+        stats.update(
+            zip(stats_losses, torch.stack(list(stats_losses.values())).detach())
+        )
 
         # force_gatherable: to-device and to-tensor if scalar for DataParallel
         loss, stats, weight = force_gatherable((loss, stats, batch_size), loss.device)
@@ -821,8 +1331,11 @@ class UnifiedTransducerModel(AbsESPnetModel):
         """
         assert speech_lengths.dim() == 1, speech_lengths.shape
 
-        # for data-parallel
-        speech = speech[:, : speech_lengths.max()]
+        # for data-parallel: only DataParallel replicas may receive a slice of the
+        # batch padded beyond its own max length, the collate_fn already trims
+        # the batch otherwise and slicing would force a host sync.
+        if getattr(self, "_is_replica", False):
+            speech = speech[:, : speech_lengths.max()]
 
         if self.frontend is not None:
             feats, feats_lengths = self.frontend(speech, speech_lengths)
@@ -834,77 +1347,337 @@ class UnifiedTransducerModel(AbsESPnetModel):
     def _calc_transducer_loss(
         self,
         encoder_out: torch.Tensor,
-        joint_out: torch.Tensor,
+        encoder_out_chunk: torch.Tensor,
+        decoder_out: torch.Tensor,
         target: torch.Tensor,
         t_len: torch.Tensor,
         u_len: torch.Tensor,
-    ) -> Tuple[torch.Tensor, Optional[float], Optional[float]]:
-        """Compute Transducer loss.
+        target_mask: torch.Tensor,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Compute Transducer loss for the full-utterance and chunk streams.
+
+        The decoder projection is shared by both streams, which are stacked along
+        the batch axis and processed by a single Transducer loss call.
         Args:
             encoder_out: Encoder output sequences. (B, T, D_enc)
-            joint_out: Joint Network output sequences (B, T, U, D_joint)
+            encoder_out_chunk: Chunk encoder output sequences. (B, T, D_enc)
+            decoder_out: Decoder output sequences. (B, U + 1, D_dec)
             target: Target label ID sequences. (B, L)
             t_len: Encoder output sequences lengths. (B,)
             u_len: Target label ID sequences lengths. (B,)
+            target_mask: Non-padding mask of target label ID sequences. (B, L)
         Return:
             loss_transducer: Transducer loss value.
-            cer_transducer: Character error rate for Transducer.
-            wer_transducer: Word Error Rate for Transducer.
+            loss_transducer_chunk: Transducer loss value for chunk stream.
         """
-        if self.criterion_transducer is None:
-            try:
-                # from warprnnt_pytorch import RNNTLoss
-            # self.criterion_transducer = RNNTLoss(
-                    # reduction="mean",
-                    # fastemit_lambda=self.fastemit_lambda,
-                # )
-                from warp_rnnt import rnnt_loss as RNNTLoss
-                self.criterion_transducer = RNNTLoss
-
-            except ImportError:
-                logging.error(
-                    "warp-rnnt was not installed."
-                    "Please consult the installation documentation."
+        batch_size = encoder_out.size(0)
+
+        t_len, u_len = t_len.repeat(2), u_len.repeat(2)
+
+        if self.use_pruned_transducer_loss:
+            loss_transducer = self._calc_pruned_transducer_loss(
+                torch.cat([encoder_out, encoder_out_chunk], dim=0),
+                decoder_out.repeat(2, 1, 1),
+                target.repeat(2, 1),
+                t_len,
+                u_len,
+            )
+        else:
+            dec_proj = self.joint_network.lin_dec(decoder_out)
+            enc_proj = self.joint_network.lin_enc(
+                torch.cat([encoder_out, encoder_out_chunk], dim=0)
+            )
+
+            if self.checkpoint_joint_network and self.training:
+                joint_out = checkpoint(
+                    self._compact_joint,
+                    enc_proj,
+                    dec_proj.repeat(2, 1, 1),
+                    t_len,
+                    u_len,
+                    project_input=False,
+                    use_reentrant=False,
                 )
-                exit(1)
-
-        # loss_transducer = self.criterion_transducer(
-        #     joint_out,
-        #     target,
-        #     t_len,
-        #     u_len,
-        # )
-        log_probs = torch.log_softmax(joint_out, dim=-1)
-
-        loss_transducer = self.criterion_transducer(
-                log_probs,
+            else:
+                joint_out = self._compact_joint(
+                    enc_proj, dec_proj.repeat(2, 1, 1), t_len, u_len, project_input=False
+                )
+                # Without checkpointing, backward does not keep the projections
+                # (the gather only saves indices): release them before the loss.
+                # The checkpointed path keeps them as inputs for recomputation.
+                del enc_proj, dec_proj
+
+            loss_transducer = self._calc_compact_transducer_loss(
+                joint_out,
+                target.repeat(2, 1),
+                t_len,
+                u_len,
+                target_mask.repeat(2, 1),
+                reduction="none",
+            )
+
+        return (
+            loss_transducer[:batch_size].mean(),
+            loss_transducer[batch_size:].mean(),
+        )
+
+    def _build_error_calculator(self) -> ErrorCalculatorTransducer:
+        """Build the Transducer error calculator on this module's decoder and joint.
+        Return:
+            : Transducer CER/WER calculator.
+        """
+        return ErrorCalculatorTransducer(
+            self.decoder,
+            self.joint_network,
+            self.token_list,
+            self.sym_space,
+            self.sym_blank,
+            report_cer=self.report_cer,
+            report_wer=self.report_wer,
+        )
+
+    def _get_error_calculator(self) -> ErrorCalculatorTransducer:
+        """Get the Transducer error calculator.
+        DataParallel replicas share the original model's attributes, the
+        calculator built in __init__ would decode with the modules on the
+        first device. Replicas build their own on their decoder and joint.
+        Return:
+            : Transducer CER/WER calculator.
+        """
+        if getattr(self, "_is_replica", False):
+            return self._build_error_calculator()
+
+        return self.error_calculator
+
+    def _check_compiled_replica(self, option: str) -> None:
+        """Reject compiled computations in DataParallel replicas.
+        DataParallel re-creates the replicas on every step, each one would
+        trigger a recompilation.
+        Args:
+            option: Name of the compile option in use.
+        """
+        if getattr(self, "_is_replica", False):
+            raise RuntimeError(
+                f"{option} is not supported with DataParallel (ngpu > 1), "
+                "use distributed training or disable the option."
+            )
+
+    def _compact_joint(
+        self,
+        enc_out: torch.Tensor,
+        dec_out: torch.Tensor,
+        t_len: torch.Tensor,
+        u_len: torch.Tensor,
+        project_input: bool = True,
+    ) -> torch.Tensor:
+        """Compute joint network outputs on the valid (t, u) pairs.
+        Args:
+            enc_out: Encoder output sequences. (B, T, D_enc)
+            dec_out: Decoder output sequences. (B, U + 1, D_dec)
+            t_len: Encoder output sequences lengths. (B,)
+            u_len: Target label ID sequences lengths. (B,)
+            project_input: Whether enc_out and dec_out still need projection.
+        Return:
+            joint_out: Joint output sequences, compact layout. (N, D_out)
+        """
+        if self.compiled_joint is None:
+            return self.joint_network.forward_compact(
+                enc_out, dec_out, t_len, u_len, project_input=project_input
+            )
+
+        self._check_compiled_replica("compile_joint_network")
+
+        return self.compiled_joint(
+            self.joint_network, enc_out, dec_out, t_len, u_len, project_input
+        )
+
+    def _calc_compact_transducer_loss(
+        self,
+        joint_out: torch.Tensor,
+        target: torch.Tensor,
+        t_len: torch.Tensor,
+        u_len: torch.Tensor,
+        target_mask: torch.Tensor,
+        reduction: str = "mean",
+    ) -> torch.Tensor:
+        """Compute Transducer loss from compact joint network outputs.
+        Args:
+            joint_out: Joint network outputs, compact layout. (N, D_out)
+            target: Target label ID sequences. (B, L)
+            t_len: Encoder output sequences lengths. (B,)
+            u_len: Target label ID sequences lengths. (B,)
+            target_mask: Non-padding mask of target label ID sequences. (B, L)
+            reduction: Reduction applied to per-sequence losses.
+        Return:
+            loss_transducer: Transducer loss value.
+        """
+        if self.criterion_transducer is None:
+            raise ImportError(
+                f"{self.transducer_loss_backend} was not installed. "
+                "Please consult the installation documentation."
+            )
+
+        if self.transducer_loss_backend == "optimized_transducer":
+            # Log-softmax is fused in the loss, gradients reuse the logits buffer.
+            return self.criterion_transducer(
+                joint_out.float(),
                 target,
                 t_len,
                 u_len,
-                reduction="mean",
                 blank=self.blank_id,
-                fastemit_lambda=self.fastemit_lambda,
-                gather=True,
+                reduction=reduction,
+            )
+
+        # FastEmit adds gradient terms on every (t, u) node, only request it if set.
+        fastemit_kwargs = (
+            {"fastemit_lambda": self.fastemit_lambda} if self.fastemit_lambda > 0 else {}
+        )
+
+        return self.criterion_transducer(
+            InplaceLogSoftmax.apply(joint_out.float()),
+            target[target_mask],
+            t_len,
+            u_len,
+            reduction=reduction,
+            blank=self.blank_id,
+            gather=True,
+            compact=True,
+            **fastemit_kwargs,
+        )
+
+    def _calc_pruned_transducer_loss(
+        self,
+        encoder_out: torch.Tensor,
+        decoder_out: torch.Tensor,
+        target: torch.Tensor,
+        t_len: torch.Tensor,
+        u_len: torch.Tensor,
+    ) -> torch.Tensor:
+        """Compute pruned Transducer loss with fast_rnnt.
+
+        A simple (trivial joiner) loss gives the pruning ranges, the joint network
+        is then only evaluated on prune_range label positions per frame.
+        Args:
+            encoder_out: Encoder output sequences. (B, T, D_enc)
+            decoder_out: Decoder output sequences. (B, U + 1, D_dec)
+            target: Target label ID sequences. (B, L)
+            t_len: Encoder output sequences lengths. (B,)
+            u_len: Target label ID sequences lengths. (B,)
+        Return:
+            loss_transducer: Transducer loss value per sequence. (B,)
+        """
+        if not is_fast_rnnt_available:
+            raise ImportError(
+                "fast_rnnt was not installed. "
+                "Please consult the installation documentation."
+            )
+
+        symbols = target.long()
+        boundary = torch.stack(
+            [torch.zeros_like(t_len), torch.zeros_like(t_len), u_len, t_len], dim=1
+        ).long()
+
+        simple_loss, (px_grad, py_grad) = fast_rnnt.rnnt_loss_simple(
+            lm=self.simple_lm_proj(decoder_out).float(),
+            am=self.simple_am_proj(encoder_out).float(),
+            symbols=symbols,
+            termination_symbol=self.blank_id,
+            boundary=boundary,
+            reduction="none",
+            return_grad=True,
+        )
+
+        ranges = fast_rnnt.get_rnnt_prune_ranges(
+            px_grad=px_grad,
+            py_grad=py_grad,
+            boundary=boundary,
+            s_range=self.prune_range,
+        )
+
+        am_pruned, lm_pruned = fast_rnnt.do_rnnt_pruning(
+            am=self.joint_network.lin_enc(encoder_out),
+            lm=self.joint_network.lin_dec(decoder_out),
+            ranges=ranges,
+        )
+        joint_out = self.joint_network(am_pruned, lm_pruned, project_input=False)
+
+        pruned_loss = fast_rnnt.rnnt_loss_pruned(
+            logits=joint_out.float(),
+            symbols=symbols,
+            ranges=ranges,
+            termination_symbol=self.blank_id,
+            boundary=boundary,
+            reduction="none",
         )
 
+        return self.simple_loss_scale * simple_loss + pruned_loss
+
+    def _calc_transducer_error(
+        self,
+        encoder_out: torch.Tensor,
+        target: torch.Tensor,
+        t_len: torch.Tensor,
+    ) -> Tuple[Optional[float], Optional[float]]:
+        """Compute Transducer CER and WER during validation.
+        Args:
+            encoder_out: Encoder output sequences. (B, T, D_enc)
+            target: Target label ID sequences. (B, L)
+            t_len: Encoder output sequences lengths. (B,)
+        Return:
+            cer_transducer: Character error rate for Transducer.
+            wer_transducer: Word Error Rate for Transducer.
+        """
         if not self.training and (self.report_cer or self.report_wer):
-            if self.error_calculator is None:
-                from funasr_local.modules.e2e_asr_common import ErrorCalculatorTransducer as ErrorCalculator
-
-                self.error_calculator = ErrorCalculator(
-                    self.decoder,
-                    self.joint_network,
-                    self.token_list,
-                    self.sym_space,
-                    self.sym_blank,
-                    report_cer=self.report_cer,
-                    report_wer=self.report_wer,
-                )
+            if (self.num_validation_batches - 1) % self.report_interval == 0:
+                return self._get_error_calculator()(encoder_out, target, t_len)
 
-            cer_transducer, wer_transducer = self.error_calculator(encoder_out, target, t_len)
-            return loss_transducer, cer_transducer, wer_transducer
+        return None, None
 
-        return loss_transducer, None, None
+    def _auxiliary_autocast(self):
+        """Get autocast context for auxiliary CTC, LM and attention heads.
+        Return:
+            : Autocast context if auxiliary_amp_dtype is set, no-op context otherwise.
+        """
+        if self.auxiliary_amp_dtype is None:
+            return nullcontext()
+
+        return autocast(dtype=self.auxiliary_amp_dtype)
+
+    def _ctc_head(self, encoder_out: torch.Tensor) -> torch.Tensor:
+        """Compute auxiliary CTC log-probabilities.
+        Args:
+            encoder_out: Encoder output sequences. (B, T, D_enc)
+        Return:
+            : CTC log-probabilities. (T, B, vocab_size)
+        """
+        with self._auxiliary_autocast():
+            ctc_in = self.ctc_lin(
+                torch.nn.functional.dropout(encoder_out, p=self.ctc_dropout_rate)
+            )
+
+        return torch.log_softmax(ctc_in.transpose(0, 1).float(), dim=-1)
+
+    def _lm_head(
+        self, decoder_out: torch.Tensor, lm_target: torch.Tensor
+    ) -> torch.Tensor:
+        """Compute summed auxiliary LM loss.
+        Args:
+            decoder_out: Decoder output sequences. (B, U, D_dec)
+            lm_target: Next label ID sequences, padded with blank ID. (B * U,)
+        Return:
+            : Summed LM loss value.
+        """
+        with self._auxiliary_autocast():
+            lm_loss_in = self.lm_lin(decoder_out).view(-1, self.vocab_size)
+
+        # Ignore blank ID (0).
+        return torch.nn.functional.cross_entropy(
+            lm_loss_in.float(),
+            lm_target,
+            ignore_index=0,
+            label_smoothing=self.lm_loss_smoothing,
+            reduction="sum",
+        )
 
     def _calc_ctc_loss(
         self,
@@ -912,6 +1685,7 @@ class UnifiedTransducerModel(AbsESPnetModel):
         target: torch.Tensor,
         t_len: torch.Tensor,
         u_len: torch.Tensor,
+        target_mask: torch.Tensor,
     ) -> torch.Tensor:
         """Compute CTC loss.
         Args:
@@ -919,18 +1693,31 @@ class UnifiedTransducerModel(AbsESPnetModel):
             target: Target label ID sequences. (B, L)
             t_len: Encoder output sequences lengths. (B,)
             u_len: Target label ID sequences lengths. (B,)
+            target_mask: Non-padding mask of target label ID sequences. (B, L)
         Return:
             loss_ctc: CTC loss value.
         """
-        ctc_in = self.ctc_lin(
-            torch.nn.functional.dropout(encoder_out, p=self.ctc_dropout_rate)
-        )
-        ctc_in = torch.log_softmax(ctc_in.transpose(0, 1), dim=-1)
-
-        target_mask = target != 0
-        ctc_target = target[target_mask].cpu()
+        if self.compiled_ctc_head is None:
+            ctc_in = self._ctc_head(encoder_out)
+        else:
+            self._check_compiled_replica("compile_auxiliary_heads")
+            ctc_in = self.compiled_ctc_head(self, encoder_out)
+
+        if self.ctc_deterministic:
+            # cuDNN's deterministic CTC kernel is only selected for float32
+            # log-probs, blank ID 0, concatenated int32 host targets, labels
+            # sequences shorter than 256 and all input lengths equal to T.
+            # ctc_loss silently falls back to the native kernel otherwise.
+            ctc_context = torch.backends.cudnn.flags(enabled=True, deterministic=True)
+            ctc_target = target[target_mask].cpu()
+        else:
+            # The native kernel reads padded (B, L) targets up to u_len.
+            ctc_context = nullcontext()
+            ctc_target = target
 
-        with torch.backends.cudnn.flags(deterministic=True):
+        # ctc_loss copies t_len and u_len to the host internally, so each call
+        # still syncs once: encoder output lengths only exist on the device here.
+        with ctc_context:
             loss_ctc = torch.nn.functional.ctc_loss(
                 ctc_in,
                 ctc_target,
@@ -955,27 +1742,16 @@ class UnifiedTransducerModel(AbsESPnetModel):
         Return:
             loss_lm: LM loss value.
         """
-        lm_loss_in = self.lm_lin(decoder_out[:, :-1, :]).view(-1, self.vocab_size)
-        lm_target = target.view(-1).type(torch.int64)
-
-        with torch.no_grad():
-            true_dist = lm_loss_in.clone()
-            true_dist.fill_(self.lm_loss_smoothing / (self.vocab_size - 1))
-
-            # Ignore blank ID (0)
-            ignore = lm_target == 0
-            lm_target = lm_target.masked_fill(ignore, 0)
+        # The last decoder state has no next label: targets are padded with the
+        # ignored blank ID rather than slicing (and copying) decoder_out.
+        lm_target = torch.nn.functional.pad(target, (0, 1)).view(-1).to(torch.long)
 
-            true_dist.scatter_(1, lm_target.unsqueeze(1), (1 - self.lm_loss_smoothing))
-
-        loss_lm = torch.nn.functional.kl_div(
-            torch.log_softmax(lm_loss_in, dim=1),
-            true_dist,
-            reduction="none",
-        )
-        loss_lm = loss_lm.masked_fill(ignore.unsqueeze(1), 0).sum() / decoder_out.size(
-            0
-        )
+        if self.compiled_lm_head is None:
+            loss_lm = self._lm_head(decoder_out, lm_target)
+        else:
+            self._check_compiled_replica("compile_auxiliary_heads")
+            loss_lm = self.compiled_lm_head(self, decoder_out, lm_target)
+        loss_lm = loss_lm / decoder_out.size(0)
 
         return loss_lm
 
@@ -986,30 +1762,34 @@ class UnifiedTransducerModel(AbsESPnetModel):
         ys_pad: torch.Tensor,
         ys_pad_lens: torch.Tensor,
     ):
-        if hasattr(self, "lang_token_id") and self.lang_token_id is not None:
-            ys_pad = torch.cat(
-                [
-                    self.lang_token_id.repeat(ys_pad.size(0), 1).to(ys_pad.device),
-                    ys_pad,
-                ],
-                dim=1,
+        if getattr(self, "lang_token_id", None) is not None:
+            # Prepend the language token in place of a repeated (B, 1) tensor + cat.
+            ys_pad = torch.nn.functional.pad(
+                ys_pad, (1, 0), value=int(self.lang_token_id)
             )
-            ys_pad_lens += 1
-
-        ys_in_pad, ys_out_pad = add_sos_eos(ys_pad, self.sos, self.eos, self.ignore_id)
+            # Not in-place: ys_pad_lens is the caller's text_lengths.
+            ys_pad_lens = ys_pad_lens + 1
+
+        # Same as add_sos_eos, without per-utterance slicing, cats and re-padding.
+        ys_in_pad = torch.nn.functional.pad(ys_pad, (1, 0), value=self.sos)
+        ys_in_pad.masked_fill_(ys_in_pad == self.ignore_id, self.eos)
+        ys_out_pad = torch.nn.functional.pad(ys_pad, (0, 1), value=self.ignore_id)
+        ys_out_pad.scatter_(1, ys_pad_lens.unsqueeze(1).long(), self.eos)
         ys_in_lens = ys_pad_lens + 1
 
         # 1. Forward decoder
-        decoder_out, _ = self.att_decoder(
-            encoder_out, encoder_out_lens, ys_in_pad, ys_in_lens
-        )
+        with self._auxiliary_autocast():
+            decoder_out, _ = self.att_decoder(
+                encoder_out, encoder_out_lens, ys_in_pad, ys_in_lens
+            )
 
         # 2. Compute attention loss
-        loss_att = self.criterion_att(decoder_out, ys_out_pad)
-        acc_att = th_accuracy(
-            decoder_out.view(-1, self.vocab_size),
-            ys_out_pad,
-            ignore_label=self.ignore_id,
+        loss_att = self.criterion_att(decoder_out.float(), ys_out_pad)
+
+        # Kept on device: th_accuracy converts to Python floats (host sync).
+        att_mask = ys_out_pad != self.ignore_id
+        acc_att = (decoder_out.argmax(-1).eq(ys_out_pad) & att_mask).sum() / (
+            att_mask.sum().clamp(min=1)
         )
 
         return loss_att, acc_att
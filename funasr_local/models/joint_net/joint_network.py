@@ -59,3 +59,42 @@ class JointNetwork(torch.nn.Module):
         else:
             joint_out = self.joint_activation(enc_out + dec_out)
         return self.lin_out(joint_out)
+
+    def forward_compact(
+        self,
+        enc_out: torch.Tensor,
+        dec_out: torch.Tensor,
+        t_len: torch.Tensor,
+        u_len: torch.Tensor,
+        project_input: bool = True,
+    ) -> torch.Tensor:
+        """Joint computation restricted to the valid (t, u) pairs.
+
+        Only the sum(T_i * (U_i + 1)) valid pairs are gathered, so the padded
+        (B, T, U, D_out) joint tensor is never materialized.
+
+        Args:
+            enc_out: Encoder output state sequences. (B, T, D_enc)
+            dec_out: Decoder output state sequences. (B, U + 1, D_dec)
+            t_len: Encoder output sequences lengths. (B,)
+            u_len: Target label ID sequences lengths. (B,)
+
+        Returns:
+            joint_out: Joint output state sequences, compact layout. (N, D_out)
+
+        """
+        max_t, max_u = enc_out.size(1), dec_out.size(1)
+
+        t_mask = torch.arange(max_t, device=t_len.device) < t_len.unsqueeze(1)
+        u_mask = torch.arange(max_u, device=u_len.device) <= u_len.unsqueeze(1)
+
+        b_idx, t_idx, u_idx = (t_mask.unsqueeze(2) & u_mask.unsqueeze(1)).nonzero(
+            as_tuple=True
+        )
+
+        if project_input:
+            enc_out, dec_out = self.lin_enc(enc_out), self.lin_dec(dec_out)
+
+        joint_out = self.joint_activation(enc_out[b_idx, t_idx] + dec_out[b_idx, u_idx])
+
+        return self.lin_out(joint_out)
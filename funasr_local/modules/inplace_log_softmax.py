@@ -0,0 +1,32 @@
+"""In-place log-softmax for large joint network outputs."""
+
+import torch
+
+
+class InplaceLogSoftmax(torch.autograd.Function):
+    """Log-softmax over the last dimension, written into the input tensor.
+
+    The gradient only depends on the output, so the input buffer can be reused
+    for the log-probabilities instead of allocating a second (N, V) tensor.
+    The input must not be needed by any other backward function.
+
+    """
+
+    @staticmethod
+    def forward(ctx, x: torch.Tensor) -> torch.Tensor:
+        x.sub_(torch.logsumexp(x, dim=-1, keepdim=True))
+
+        ctx.mark_dirty(x)
+        ctx.save_for_backward(x)
+
+        return x
+
+    @staticmethod
+    def backward(ctx, grad: torch.Tensor) -> torch.Tensor:
+        (log_probs,) = ctx.saved_tensors
+
+        # grad - exp(log_probs) * sum(grad), with a single (N, V) temporary.
+        grad_in = log_probs.exp()
+        grad_in.mul_(-grad.sum(dim=-1, keepdim=True)).add_(grad)
+
+        return grad_in
@@ -641,9 +641,9 @@ def get_transducer_task_io(
 
     Returns:
         decoder_in: Decoder inputs. (B, U)
-        target: Target label ID sequences. (B, U)
-        t_len: Time lengths. (B,)
-        u_len: Label lengths. (B,)
+        target: Target label ID sequences, int32. (B, U)
+        t_len: Time lengths, int32. (B,)
+        u_len: Label lengths, int32. (B,)
 
     """
 
@@ -682,10 +682,9 @@ def get_transducer_task_io(
 
     target = pad_list(labels_unpad, blank_id).type(torch.int32).to(device)
 
-    encoder_out_lens = list(map(int, encoder_out_lens))
-    t_len = torch.IntTensor(encoder_out_lens).to(device)
+    t_len = encoder_out_lens.to(device=device, dtype=torch.int32)
 
-    u_len = torch.IntTensor([y.size(0) for y in labels_unpad]).to(device)
+    u_len = (labels != ignore_id).sum(dim=1).to(dtype=torch.int32)
 
     return decoder_in, target, t_len, u_len
 